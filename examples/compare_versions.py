@@ -1,12 +1,15 @@
 import argparse
+import csv
 import datetime
 import json
 import os
+import re
 import semver
 from dotenv import load_dotenv
 
 import sys
 import finite_state_sdk
+from finite_state_sdk.token_cache import TokenCache
 
 """
 Compare Asset Versions to see what changed between them
@@ -28,71 +31,127 @@ Pass the path to the .secrets file as an argument to this script (--secrets-file
 DO NOT COMMIT THE SECRET FILE TO YOUR SOURCE CODE REPOSITORY!!!
 """
 
+# write CSV files through a 1 MiB buffer instead of the default 8 KiB
+CSV_BUFFER_SIZE = 1024**2
+
+# characters replaced with underscores in output filenames, applied in a single pass
+# covers spaces, parentheses, path separators and the characters Windows does not allow in filenames
+FILENAME_TRANSLATION = str.maketrans({character: '_' for character in ' ()/\\:*?"<>|'})
+
+# versions in plain MAJOR.MINOR.PATCH form can be compared without a full semver parse
+# only matches what semver itself accepts: ASCII digits without leading zeros
+SIMPLE_VERSION_PATTERN = re.compile(r'(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)', re.ASCII)
+
+# only the finding fields compare_cves reads, so the comparison does not download descriptions, exploit and EPSS data
+# takes the same variables as finite_state_sdk.queries.GET_FINDINGS
+CVE_FINDINGS_QUERY = """
+query GetCveFindingsForComparison (
+    $filter: FindingFilter,
+    $after: String,
+    $first: Int,
+    $orderBy: [FindingOrderBy!]
+) {
+    allFindings(filter: $filter,
+                after: $after,
+                first: $first,
+                orderBy: $orderBy
+    ) {
+        _cursor
+        cvssScore
+        cvssSeverity
+        affects {
+            name
+            version
+        }
+        currentStatus {
+            status
+        }
+        cves {
+            cveId
+        }
+    }
+}"""
+
 
 def compare_cves(version1_findings, version2_findings):
-    cve_changes = []
+    """
+    Compares the CVE findings between two asset versions, yielding a change for each CVE that was introduced or remediated
+    Each list of findings is only iterated once, so they can be generators that fetch the findings page by page
+    """
+    version1_cve_ids = set()
+    version2_cve_ids = set()
 
-    version1_cve_ids = []
-    version2_cve_ids = [finding['cves'][0]['cveId'] for finding in version2_findings]
+    version2_skip_list = set()
 
-    version2_skip_list = []
+    # version 1 findings are reduced to the change that would be reported if they were remediated
+    remediated_candidates = []
 
     # double check for findings that were resolved
     for finding in version1_findings:
         cve_id = finding['cves'][0]['cveId']
+        current_status = finding['currentStatus']
         skip = False
-        if finding['currentStatus'] is not None:
-            if finding['currentStatus']['status'] == 'NOT_AFFECTED' or finding['currentStatus']['status'] == 'FIXED':
+        if current_status is not None:
+            status = current_status['status']
+            if status == 'NOT_AFFECTED' or status == 'FIXED':
                 skip = True
-                version2_skip_list.append(cve_id)
+                version2_skip_list.add(cve_id)
 
         if not skip:
-            version1_cve_ids.append(cve_id)
+            version1_cve_ids.add(cve_id)
+
+        name = 'Not Specified'
+        version = 'Not Specified'
+        affects = finding.get('affects') or ()
+        if affects:
+            name = affects[0]['name']
+            version = affects[0]['version']
+        remediated_candidates.append({'action': 'REMEDIATED', 'cve_id': cve_id, 'name': name, 'version': version, 'cvssSeverity': finding['cvssSeverity'], 'cvssScore': finding['cvssScore']})
 
     # Findings that were introduced
     for finding in version2_findings:
         cve_id = finding['cves'][0]['cveId']
-        if cve_id in version2_skip_list:
+        version2_cve_ids.add(cve_id)
+        if cve_id in version2_skip_list or cve_id in version1_cve_ids:
             continue
 
-        if cve_id not in version1_cve_ids:
-            affects = finding['affects'][0]
-            cve_changes.append({'action': 'INTRODUCED', 'cve_id': cve_id, 'name': affects['name'], 'version': affects['version'], 'cvssSeverity': finding['cvssSeverity'], 'cvssScore': finding['cvssScore']})
+        affects = finding['affects'][0]
+        yield {'action': 'INTRODUCED', 'cve_id': cve_id, 'name': affects['name'], 'version': affects['version'], 'cvssSeverity': finding['cvssSeverity'], 'cvssScore': finding['cvssScore']}
 
     # Findings that were remediated
-    for finding in version1_findings:
-        cve_id = finding['cves'][0]['cveId']
+    for cve_change in remediated_candidates:
+        if cve_change['cve_id'] not in version2_cve_ids:
+            yield cve_change
 
-        if cve_id not in version2_cve_ids:
-            if 'affects' in finding and len(finding['affects']) > 0:
-                affects = finding['affects'][0]
-                cve_changes.append({'action': 'REMEDIATED', 'cve_id': cve_id, 'name': affects['name'], 'version': affects['version'], 'cvssSeverity': finding['cvssSeverity'], 'cvssScore': finding['cvssScore']})
-            else:
-                cve_changes.append({'action': 'REMEDIATED', 'cve_id': cve_id, 'name': 'Not Specified', 'version': 'Not Specified', 'cvssSeverity': finding['cvssSeverity'], 'cvssScore': finding['cvssScore']})
 
-    return cve_changes
+def compare_version_strings(version1, version2):
+    """
+    Compares two version strings, returns a negative number if version1 is older, 0 if they are equal, and a positive number if version1 is newer
+    Raises ValueError if the versions are not valid semver strings
+    """
+    match1 = SIMPLE_VERSION_PATTERN.fullmatch(version1)
+    match2 = SIMPLE_VERSION_PATTERN.fullmatch(version2)
+    if match1 and match2:
+        parts1 = tuple(map(int, match1.groups()))
+        parts2 = tuple(map(int, match2.groups()))
+        return (parts1 > parts2) - (parts1 < parts2)
+
+    return semver.compare(version1, version2)
 
 
 def smart_lookup(needle, haystack):
+    # needle and haystack are expected to be lower case already, names are lower cased once when building the lookup tables
     # print(f"Looking for {needle} in {haystack}")
 
     # look for an exact match first
-    for hay in haystack:
-        hay = hay.lower()
-        if needle == hay:
-            return hay
+    if needle in haystack:
+        return needle
 
     # for short needles they have to match exactly
     if len(needle) < 3:
-        for hay in haystack:
-            hay = hay.lower()
-            if needle == hay:
-                return hay
         return None
 
     for hay in haystack:
-        hay = hay.lower()
-
         # for short hays, they have to match exactly
         if len(hay) < 3:
             if needle == hay:
@@ -147,9 +206,9 @@ def compare_sw_components(sw_components_fw1, sw_components_fw2, verbose=False):
             if sw1['type'] == 'FILE':
                 # print(f"skipping file: {sw1['name']}")
                 continue
-        except Exception:
+        except (KeyError, TypeError):
             print(f"sw1: {json.dumps(sw1, indent=2)}")
-            exit(1)
+            sys.exit(1)
 
         name = ''
         version = ''
@@ -160,9 +219,7 @@ def compare_sw_components(sw_components_fw1, sw_components_fw2, verbose=False):
         if name == '' or version == '':
             continue
 
-        if name not in sw1_name_versions_map:
-            sw1_name_versions_map[name] = []
-        sw1_name_versions_map[name].append(version)
+        sw1_name_versions_map.setdefault(name, []).append(version)
 
     for sw2 in sw_components_fw2:
         # don't compare File type components
@@ -170,9 +227,9 @@ def compare_sw_components(sw_components_fw1, sw_components_fw2, verbose=False):
             if sw2['type'] == 'FILE':
                 # print(f"skipping file: {sw2['name']}")
                 continue
-        except Exception:
-            print(f"sw2: {json.dumps(sw1, indent=2)}")
-            exit(1)
+        except (KeyError, TypeError):
+            print(f"sw2: {json.dumps(sw2, indent=2)}")
+            sys.exit(1)
 
         name = ''
         version = ''
@@ -182,17 +239,29 @@ def compare_sw_components(sw_components_fw1, sw_components_fw2, verbose=False):
 
         if name == '' or version == '':
             continue
-        if name not in sw2_name_versions_map:
-            sw2_name_versions_map[name] = []
-        sw2_name_versions_map[name].append(version)
+
+        sw2_name_versions_map.setdefault(name, []).append(version)
+
+    # if one side has no components to compare, everything on the other side was either removed or added
+    # this gives the same changes, in the same order, as the name matching below without a lookup per name
+    if not sw1_name_versions_map:
+        for sw_name, versions in sw2_name_versions_map.items():
+            for version2 in versions:
+                sw_component_changes.append({'action': 'ADDED', 'name': sw_name, 'version2': version2})
+                if verbose:
+                    print(f"ADDED: {sw_name} {version2} because name was not in sw1_versions")
+        return sw_component_changes
+    if not sw2_name_versions_map:
+        for sw_name, versions in sw1_name_versions_map.items():
+            for version1 in versions:
+                sw_component_changes.append({'action': 'REMOVED', 'name': sw_name, 'version1': version1})
+        return sw_component_changes
 
     # TODO: add CVE information for software to be able to add additional context like "High Risk Components Added"
 
     # for each software component in version 1, check if it is in version 2
     already_found_list = []
     for sw_name in sw1_name_versions_map:
-        sw_name = sw_name.lower()
-
         matching_sw2_version_name = smart_lookup(sw_name, sw2_name_versions_map.keys())
         # if we already found a matching name and it is not an exact match, skip it
         if matching_sw2_version_name in already_found_list and sw_name != matching_sw2_version_name:
@@ -223,8 +292,6 @@ def compare_sw_components(sw_components_fw1, sw_components_fw2, verbose=False):
 
     already_found_list = []
     for sw_name in sw2_name_versions_map:
-        sw_name = sw_name.lower()
-
         # software present in version 2 but not present in version 1 (ADDED)
         matching_sw1_version_name = smart_lookup(sw_name, sw1_name_versions_map.keys())
         # if we already found a matching name and it is not an exact match, skip it
@@ -257,12 +324,13 @@ def compare_sw_components(sw_components_fw1, sw_components_fw2, verbose=False):
                             pass
                         else:
                             try:
-                                if semver.compare(version1, version2) < 0:
+                                if compare_version_strings(version1, version2) < 0:
                                     sw_component_changes.append({'action': 'UPDATED', 'name': matching_sw1_version_name, 'name2': sw_name, 'version1': version1, 'version2': version2})
                                 else:
                                     sw_component_changes.append({'action': 'ADDED', 'name': sw_name, 'version2': version2})
-                                    print(f"ADDED: {sw_name} {version2} because semver.compare({version1}, {version2}) < 0")
-                            except Exception:
+                                    print(f"ADDED: {sw_name} {version2} because compare_version_strings({version1}, {version2}) >= 0")
+                            except ValueError:
+                                # not a semantic version, so it can't be ordered - report it as an update
                                 sw_component_changes.append({'action': 'UPDATED', 'name': matching_sw1_version_name, 'name2': sw_name, 'version1': version1, 'version2': version2})
 
     return sw_component_changes
@@ -289,13 +357,22 @@ def main():
 
     # Get an auth token - this is a bearer token that you will use for all subsequent requests
     # The token is valid for 10 hours by default
-
-    token = finite_state_sdk.get_auth_token(CLIENT_ID, CLIENT_SECRET)
+    # The token is cached on disk so that consecutive report runs share it instead of re-authenticating
+    token_cache = TokenCache(ORGANIZATION_CONTEXT, client_id=CLIENT_ID)
+    token = token_cache.get_token(CLIENT_ID, CLIENT_SECRET)
 
     asset_version_id_1 = args.asset_version_1
     asset_version_id_2 = args.asset_version_2
 
-    print(f'\033[0mComparing asset version {asset_version_id_1} to asset version {asset_version_id_2}')
+    # only color the output when it is going to a terminal
+    use_color = sys.stdout.isatty()
+    RED = "\033[91m" if use_color else ""
+    GREEN = "\033[92m" if use_color else ""
+    YELLOW = "\033[93m" if use_color else ""
+    PURPLE = "\033[95m" if use_color else ""
+    RESET = "\033[0m" if use_color else ""
+
+    print(f'{RESET}Comparing asset version {asset_version_id_1} to asset version {asset_version_id_2}')
 
     asset_version_1 = finite_state_sdk.get_asset_versions(token, ORGANIZATION_CONTEXT, asset_version_id=asset_version_id_1)
     print(f'Asset version 1: {asset_version_1[0]["asset"]["name"]} {asset_version_1[0]["name"]}')
@@ -309,8 +386,9 @@ def main():
             print('CVE Analysis')
             print("*" * 80)
 
-        version1_findings = finite_state_sdk.get_findings(token, ORGANIZATION_CONTEXT, asset_version_id=asset_version_id_1, category="CVE")
-        version2_findings = finite_state_sdk.get_findings(token, ORGANIZATION_CONTEXT, asset_version_id=asset_version_id_2, category="CVE")
+        # stream the findings page by page rather than loading them all up front
+        version1_findings = finite_state_sdk.iterate_paginated_results(token, ORGANIZATION_CONTEXT, CVE_FINDINGS_QUERY, finite_state_sdk.queries.GET_FINDINGS['variables'](asset_version_id=asset_version_id_1, category="CVE"), 'allFindings')
+        version2_findings = finite_state_sdk.iterate_paginated_results(token, ORGANIZATION_CONTEXT, CVE_FINDINGS_QUERY, finite_state_sdk.queries.GET_FINDINGS['variables'](asset_version_id=asset_version_id_2, category="CVE"), 'allFindings')
 
         cve_changes = compare_cves(version1_findings, version2_findings)
 
@@ -319,23 +397,24 @@ def main():
         remediated_messages = []
 
         cve_changes_filename = f'{dt_str}-{asset_version_1[0]["asset"]["name"]}-{asset_version_1[0]["name"]}-to-{asset_version_2[0]["name"]}-cve_changes.csv'
-        # replace filename spaces with underscores
-        cve_changes_filename = cve_changes_filename.replace(' ', '_')
-        with open(cve_changes_filename, 'w') as f:
+        # replace filename spaces, parentheses and unsafe characters with underscores
+        cve_changes_filename = cve_changes_filename.translate(FILENAME_TRANSLATION)
+        with open(cve_changes_filename, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
+            writer = csv.writer(f)
             # write header
-            f.write('action,cve_id,name,version,cvssSeverity,cvssScore\n')
+            writer.writerow(['action', 'cve_id', 'name', 'version', 'cvssSeverity', 'cvssScore'])
 
             for cve_change in cve_changes:
                 # write to csv
-                f.write(f"{cve_change['action']},{cve_change['cve_id']},{cve_change['name']},{cve_change['version']},{cve_change['cvssSeverity']},{cve_change['cvssScore']}\n")
+                writer.writerow([cve_change['action'], cve_change['cve_id'], cve_change['name'], cve_change['version'], cve_change['cvssSeverity'], cve_change['cvssScore']])
                 if 'action' in cve_change:
                     if cve_change['action'] == 'INTRODUCED':
-                        # print in green
-                        introduced_messages.append(f"\033[91m{cve_change['cve_id']} was introduced for {cve_change['name']} {cve_change['version']} - [{cve_change['cvssSeverity']}] ({cve_change['cvssScore']})\033[0m")
+                        # print in red
+                        introduced_messages.append(f"{RED}{cve_change['cve_id']} was introduced for {cve_change['name']} {cve_change['version']} - [{cve_change['cvssSeverity']}] ({cve_change['cvssScore']}){RESET}")
 
                     elif cve_change['action'] == 'REMEDIATED':
-                        # print in red
-                        remediated_messages.append(f"\033[92m{cve_change['cve_id']} was remediated for {cve_change['name']} {cve_change['version']} - [{cve_change['cvssSeverity']}] ({cve_change['cvssScore']})\033[0m")
+                        # print in green
+                        remediated_messages.append(f"{GREEN}{cve_change['cve_id']} was remediated for {cve_change['name']} {cve_change['version']} - [{cve_change['cvssSeverity']}] ({cve_change['cvssScore']}){RESET}")
 
             print(f'Wrote CVE changes to {cve_changes_filename}')
 
@@ -355,34 +434,28 @@ def main():
 
     # output all software components for each version to a csv file
     sw_components_filename1 = f'{dt_str}-{asset_version_1[0]["asset"]["name"]}-{asset_version_1[0]["name"]}-sw_components.csv'
-    # replace filename spaces with underscores
-    sw_components_filename1 = sw_components_filename1.replace(' ', '_')
-    # replace parentheses with underscores
-    sw_components_filename1 = sw_components_filename1.replace('(', '_')
-    sw_components_filename1 = sw_components_filename1.replace(')', '_')
-    with open(sw_components_filename1, 'w') as f:
+    # replace filename spaces, parentheses and unsafe characters with underscores
+    sw_components_filename1 = sw_components_filename1.translate(FILENAME_TRANSLATION)
+    with open(sw_components_filename1, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
         # write header
-        f.write('name,version\n')
+        writer.writerow(['name', 'version'])
 
-        for sw_component in version1_software_components:
-            # write to csv
-            f.write(f"{sw_component['name']},{sw_component['version']}\n")
+        # write to csv
+        writer.writerows([sw_component['name'], sw_component['version']] for sw_component in version1_software_components)
 
         print(f'Wrote Software Components to {sw_components_filename1}')
 
     sw_components_filename2 = f'{dt_str}-{asset_version_2[0]["asset"]["name"]}-{asset_version_2[0]["name"]}-sw_components.csv'
-    # replace filename spaces with underscores
-    sw_components_filename2 = sw_components_filename2.replace(' ', '_')
-    # replace parentheses with underscores
-    sw_components_filename2 = sw_components_filename2.replace('(', '_')
-    sw_components_filename2 = sw_components_filename2.replace(')', '_')
-    with open(sw_components_filename2, 'w') as f:
+    # replace filename spaces, parentheses and unsafe characters with underscores
+    sw_components_filename2 = sw_components_filename2.translate(FILENAME_TRANSLATION)
+    with open(sw_components_filename2, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
         # write header
-        f.write('name,version\n')
+        writer.writerow(['name', 'version'])
 
-        for sw_component in version2_software_components:
-            # write to csv
-            f.write(f"{sw_component['name']},{sw_component['version']}\n")
+        # write to csv
+        writer.writerows([sw_component['name'], sw_component['version']] for sw_component in version2_software_components)
 
         print(f'Wrote Software Components to {sw_components_filename2}')
 
@@ -396,38 +469,32 @@ def main():
     removed_messages = []
     nochange_messages = []
 
+    # message bucket and template for each action
+    action_messages = {
+        # print in green
+        'ADDED': (added_messages, GREEN + "{name} was added with version {version2}" + RESET),
+        # print in yellow
+        'UPDATED': (updated_messages, YELLOW + "{name} was updated from {version1} to {version2}" + RESET),
+        # print in red
+        'REMOVED': (removed_messages, RED + "{name} was removed with version {version1}" + RESET),
+        # print in purple
+        'NO_CHANGE': (nochange_messages, PURPLE + "{name} has no change with version {version1}" + RESET),
+    }
+
     sw_changes_filename = f'{dt_str}-{asset_version_1[0]["asset"]["name"]}-{asset_version_1[0]["name"]}-to-{asset_version_2[0]["name"]}-sw_component_changes.csv'
-    # replace filename spaces with underscores
-    sw_changes_filename = sw_changes_filename.replace(' ', '_')
-    with open(sw_changes_filename, 'w') as f:
+    # replace filename spaces, parentheses and unsafe characters with underscores
+    sw_changes_filename = sw_changes_filename.translate(FILENAME_TRANSLATION)
+    with open(sw_changes_filename, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
         # write header
-        f.write('action,name,version1,version2\n')
+        writer.writerow(['action', 'name', 'version1', 'version2'])
 
         for sw_change in sw_changes:
             # write to csv
-            f.write(f"{sw_change['action']},{sw_change['name']}")
-            if "version1" in sw_change:
-                f.write(f",{sw_change['version1']}")
-            else:
-                f.write(",")
-            if "version2" in sw_change:
-                f.write(f",{sw_change['version2']}\n")
-            else:
-                f.write(",\n")
-
-            if 'action' in sw_change:
-                if sw_change['action'] == 'UPDATED':
-                    # print in yellow
-                    updated_messages.append(f"\033[93m{sw_change['name']} was updated from {sw_change['version1']} to {sw_change['version2']}\033[0m")
-                elif sw_change['action'] == 'ADDED':
-                    # print in green
-                    added_messages.append(f"\033[92m{sw_change['name']} was added with version {sw_change['version2']}\033[0m")
-                elif sw_change['action'] == 'REMOVED':
-                    # print in red
-                    removed_messages.append(f"\033[91m{sw_change['name']} was removed with version {sw_change['version1']}\033[0m")
-                elif sw_change['action'] == 'NO_CHANGE':
-                    # print in purple
-                    nochange_messages.append(f"\033[95m{sw_change['name']} has no change with version {sw_change['version1']}\033[0m")
+            writer.writerow([sw_change['action'], sw_change['name'], sw_change.get('version1', ''), sw_change.get('version2', '')])
+
+            messages, template = action_messages[sw_change['action']]
+            messages.append(template.format(**sw_change))
 
         print(f'Wrote Software Component changes to {sw_changes_filename}')
 
@@ -461,32 +528,18 @@ def main():
 
     # write a csv file
     sw_changes_interleaved_filename = f'{dt_str}-{asset_version_1[0]["asset"]["name"]}-{asset_version_1[0]["name"]}-to-{asset_version_2[0]["name"]}-sw_changes_interleaved.csv'
-    # replace filename spaces with underscores
-    sw_changes_interleaved_filename = sw_changes_interleaved_filename.replace(' ', '_')
-    with open(sw_changes_interleaved_filename, 'w') as f:
+    # replace filename spaces, parentheses and unsafe characters with underscores
+    sw_changes_interleaved_filename = sw_changes_interleaved_filename.translate(FILENAME_TRANSLATION)
+    with open(sw_changes_interleaved_filename, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f)
         # write header
-        f.write('action,name,name2,version1,version2\n')
+        writer.writerow(['action', 'name', 'name2', 'version1', 'version2'])
         for sw_change in sw_changes:
             if sw_change['action'] == 'ADDED':
                 sw_change['name2'] = sw_change['name']
                 sw_change['name'] = ''
 
-            f.write(f"{sw_change['action']},{sw_change['name']}")
-
-            if "name2" in sw_change:
-                f.write(f",{sw_change['name2']}")
-            else:
-                f.write(",")
-
-            if "version1" in sw_change:
-                f.write(f",{sw_change['version1']}")
-            else:
-                f.write(",")
-
-            if "version2" in sw_change:
-                f.write(f",{sw_change['version2']}\n")
-            else:
-                f.write(",\n")
+            writer.writerow([sw_change['action'], sw_change['name'], sw_change.get('name2', ''), sw_change.get('version1', ''), sw_change.get('version2', '')])
 
         print(f'Wrote Software Component changes to {sw_changes_interleaved_filename}')
 
@@ -3,7 +3,7 @@ import finite_state_sdk
 import requests
 
 
-def custom_download_report(token, organization_context, report_type="CSV", report_subtype="ALL_FINDINGS", asset_version_id=None, output_filename=None):
+def custom_download_report(token, organization_context, report_type="CSV", report_subtype="ALL_FINDINGS", asset_version_id=None, output_filename=None, session=None):
     """
     Demonstration of a method for getting a download URL.
     Downloads a report from the Finite State Platform and saves it to the specified output_filename.
@@ -14,27 +14,38 @@ def custom_download_report(token, organization_context, report_type="CSV", repor
     :param report_subtype: The subtype of report to download. Valid values are "ALL_FINDINGS", "ALL_COMPONENTS", "EXPLOIT_INTELLIGENCE", and "RISK_SUMMARY". See API documentation for details.
     :param asset_version_id: The asset version ID to download the SBOM for
     :param output_filename: The filename to save the SBOM to
+    :param session: Optional requests.Session to reuse connections across downloads. A new session is created if not provided.
     """
-    url = finite_state_sdk.generate_report_download_url(token, organization_context, asset_version_id=asset_version_id, report_type=report_type, report_subtype=report_subtype, verbose=True) -> str:
+    url = finite_state_sdk.generate_report_download_url(token, organization_context, asset_version_id=asset_version_id, report_type=report_type, report_subtype=report_subtype, verbose=True)
 
-    # Send an HTTP GET request to the URL
-    response = requests.get(url)
+    # only close the session if it was created here
+    own_session = session is None
+    session = session or requests.Session()
 
-    # Check if the request was successful (status code 200)
-    if response.status_code == 200:
-        # Open a local file in binary write mode and write the content to it
-        print("File downloaded successfully.")
-        with open(output_filename, 'wb') as file:
-            file.write(response.content)
-            print(f'Wrote file to {output_filename}')
-    else:
-        print("Failed to download the file. Status code:", response.status_code)
+    try:
+        # Send an HTTP GET request to the URL, streaming the body so large reports are not held in memory
+        with session.get(url, stream=True) as response:
+            # Check if the request was successful (status code 200)
+            if response.status_code == 200:
+                # Open a local file in binary write mode and write the content to it in 1 MiB chunks
+                print("File downloaded successfully.")
+                with open(output_filename, 'wb') as file:
+                    for chunk in response.iter_content(chunk_size=1024**2):
+                        file.write(chunk)
+                    print(f'Wrote file to {output_filename}')
+            else:
+                print("Failed to download the file. Status code:", response.status_code)
+    finally:
+        if own_session:
+            session.close()
 
 
 def example_download_reports(token, organization_context):
     # Download Reports for an asset version using custom method
     asset_version_id = '123456789'
-    custom_download_report(token, organization_context, report_type="CSV", report_subttype="ALL_FINDINGS", asset_version_id=asset_version_id, output_filename=f'{asset_version_id}-all_findings.csv')
+    # Pass a shared session to reuse its keep-alive connection when downloading several reports
+    with requests.Session() as session:
+        custom_download_report(token, organization_context, report_type="CSV", report_subtype="ALL_FINDINGS", asset_version_id=asset_version_id, output_filename=f'{asset_version_id}-all_findings.csv', session=session)
 
     # Download Reports for an asset version using built-in SDK functions
     downloads_folder = "downloads"
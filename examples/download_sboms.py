@@ -1,8 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import shutil
+
 import finite_state_sdk
 import requests
+from requests.adapters import HTTPAdapter
+
+# shared session so repeated downloads reuse pooled keep-alive connections instead of a new TLS handshake each time
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
 
 
-def custom_download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbom_subtype="SBOM_ONLY", asset_version_id=None, output_filename=None):
+def custom_download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbom_subtype="SBOM_ONLY", asset_version_id=None, output_filename=None, session=None):
     """
     Demonstration of a method for getting a download URL. Downloads an SBOM from the Finite State Platform and saves it to the specified output_filename.
     You could build your own method to do something else with the URL, or you can use the built-in finite_state_sdk.download_sbom() method.
@@ -12,28 +20,40 @@ def custom_download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbo
     :param sbom_subtype: The subtype of SBOM to download. Valid values are "SBOM_ONLY", "SBOM_WITH_VDR", and "VDR_ONLY"
     :param asset_version_id: The asset version ID to download the SBOM for
     :param output_filename: The filename to save the SBOM to
+    :param session: Optional requests.Session to download with. Defaults to a shared module-level session.
     """
     url = finite_state_sdk.generate_sbom_download_url(token, organization_context, sbom_type=sbom_type, sbom_subtype=sbom_subtype, asset_version_id=asset_version_id)
 
-    # Send an HTTP GET request to the URL
-    response = requests.get(url)
+    if session is None:
+        session = _SESSION
 
-    # Check if the request was successful (status code 200)
-    if response.status_code == 200:
-        # Open a local file in binary write mode and write the content to it
-        print("File downloaded successfully.")
-        with open(output_filename, 'wb') as file:
-            file.write(response.content)
-            print(f'Wrote file to {output_filename}')
-    else:
-        print("Failed to download the file. Status code:", response.status_code)
+    # Send an HTTP GET request to the URL, streaming the body so large SBOMs are not held in memory
+    with session.get(url, stream=True) as response:
+        # Check if the request was successful (status code 200)
+        if response.status_code == 200:
+            # Copy the raw socket stream straight into a buffered file, decoding any gzip transfer encoding
+            print("File downloaded successfully.")
+            response.raw.decode_content = True
+            with open(output_filename, 'wb', buffering=1024**2) as file:
+                shutil.copyfileobj(response.raw, file, length=1024**2)
+                print(f'Wrote file to {output_filename}')
+        else:
+            print("Failed to download the file. Status code:", response.status_code)
 
 
 def example_download_sboms(token, organization_context):
-    custom_download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbom_subtype="SBOM_ONLY", asset_version_id='123456789', output_filename='sbom.cyclonedx.sbom_only.json')
-    custom_download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbom_subtype="SBOM_WITH_VDR", asset_version_id='123456789', output_filename='sbom.cyclonedx.sbom_with_vdr.json')
-    custom_download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbom_subtype="VDR_ONLY", asset_version_id='123456789', output_filename='sbom.cyclonedx.vdr_only.json')
-    custom_download_sbom(token, organization_context, sbom_type="SPDX", sbom_subtype="SBOM_ONLY", asset_version_id='123456789', output_filename='sbom.spdx.sbom_only.json')
-
-    finite_state_sdk.download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbom_subtype="SBOM_ONLY", asset_version_id='123456789', output_filename='sbom.cyclonedx.sbom_only.json', verbose=True)
-
+    asset_version_id = '123456789'
+    downloads = [
+        {"sbom_type": "CYCLONEDX", "sbom_subtype": "SBOM_ONLY", "output_filename": 'sbom.cyclonedx.sbom_only.json'},
+        {"sbom_type": "CYCLONEDX", "sbom_subtype": "SBOM_WITH_VDR", "output_filename": 'sbom.cyclonedx.sbom_with_vdr.json'},
+        {"sbom_type": "CYCLONEDX", "sbom_subtype": "VDR_ONLY", "output_filename": 'sbom.cyclonedx.vdr_only.json'},
+        {"sbom_type": "SPDX", "sbom_subtype": "SBOM_ONLY", "output_filename": 'sbom.spdx.sbom_only.json'},
+    ]
+
+    # the downloads are independent and network bound, so run them concurrently
+    with ThreadPoolExecutor(max_workers=len(downloads)) as executor:
+        futures = [executor.submit(custom_download_sbom, token, organization_context, asset_version_id=asset_version_id, **download) for download in downloads]
+        for future in as_completed(futures):
+            future.result()
+
+    finite_state_sdk.download_sbom(token, organization_context, sbom_type="CYCLONEDX", sbom_subtype="SBOM_ONLY", asset_version_id=asset_version_id, output_filename='sbom.cyclonedx.sbom_only.json', verbose=True)
@@ -1,13 +1,49 @@
 # queries the API using the SDK to generate a CSV report for all Products in the Organization
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import csv
 import datetime
 import json
+from operator import itemgetter
 import os
+import time
 from dotenv import load_dotenv
 
 import sys
 sys.path.append('..')
 import finite_state_sdk
+from finite_state_sdk.token_cache import TokenCache
+
+SEVERITIES = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
+
+# number of asset findings count requests to run at once
+MAX_WORKERS = 32
+
+# write the CSV file through a 1 MiB buffer instead of the default 8 KiB
+CSV_BUFFER_SIZE = 1024**2
+
+# findings counts are cached on disk between runs for an hour
+CACHE_FILE = os.path.join('.fs_cache', 'findings_counts.json')
+CACHE_TTL = 60 * 60
+
+
+def load_cache():
+    if not os.path.exists(CACHE_FILE):
+        return {}
+
+    with open(CACHE_FILE, 'r') as f:
+        cache = json.load(f)
+
+    # drop the entries that have expired
+    now = time.time()
+    return {key: entry for key, entry in cache.items() if now - entry[0] < CACHE_TTL}
+
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, 'w') as f:
+        json.dump(cache, f)
+
 
 def main():
     dt = datetime.datetime.now()
@@ -15,6 +51,7 @@ def main():
 
     parser = argparse.ArgumentParser(description='Generate an CSV Products Report')
     parser.add_argument('--secrets-file', type=str, help='Path to the secrets file', required=True)
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not update the local findings count cache')
 
     args = parser.parse_args()
 
@@ -27,55 +64,75 @@ def main():
 
     # Get an auth token - this is a bearer token that you will use for all subsequent requests
     # The token is valid for 24 hours
-    token = finite_state_sdk.get_auth_token(CLIENT_ID, CLIENT_SECRET)
+    # The token is cached on disk so that consecutive report runs share it instead of re-authenticating
+    token_cache = TokenCache(ORGANIZATION_CONTEXT, client_id=CLIENT_ID)
+    token = token_cache.get_token(CLIENT_ID, CLIENT_SECRET)
 
     products = finite_state_sdk.get_all_products(token, ORGANIZATION_CONTEXT)
     product_data = []
 
-    for product in products:
-        counts = {
-            'CRITICAL': 0,
-            'HIGH': 0,
-            'MEDIUM': 0,
-            'LOW': 0
-        }
-
-        product_name = product['name']
-
-        # get the default version for the assets in the product
-        for asset_version in product['assets']:
-            asset_version_id = str(asset_version['id'])
-
-            # get the count of findings for each severity
-            severities = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW']
-            for severity in severities:
-                # do this because we can't in-line the findings meta query via the API, yet, and it requires several calls to get the counts
-                count = finite_state_sdk.get_findings(token, ORGANIZATION_CONTEXT, asset_version_id=asset_version_id, severity=severity, count=True)['count']
-                counts[severity] += count
+    # get the count of findings for each severity of every asset in every product
+    # each asset's severity counts come back from a single request, and the assets are independent network calls,
+    # so run them concurrently and sum them per product
+    cache = {} if args.no_cache else load_cache()
+    counts = {(product['id'], severity): 0 for product in products for severity in SEVERITIES}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # keys: cache key, values: (future, ids of the products that include the asset)
+        # an asset that appears in more than one product is only requested once per run
+        pending = {}
+        for product in products:
+            for asset_version in product['assets']:
+                asset_version_id = str(asset_version['id'])
+                cache_key = f'findings:{asset_version_id}'
+                if cache_key in cache:
+                    for severity in SEVERITIES:
+                        counts[(product['id'], severity)] += cache[cache_key][1][severity]
+                    continue
+
+                if cache_key not in pending:
+                    future = executor.submit(finite_state_sdk.get_findings_severity_counts, token, ORGANIZATION_CONTEXT, asset_version_id=asset_version_id)
+                    pending[cache_key] = (future, [])
+                pending[cache_key][1].append(product['id'])
+
+        futures = {future: (cache_key, product_ids) for cache_key, (future, product_ids) in pending.items()}
+        for future in as_completed(futures):
+            cache_key, product_ids = futures[future]
+            severity_counts = future.result()
+            for product_id in product_ids:
+                for severity in SEVERITIES:
+                    counts[(product_id, severity)] += severity_counts[severity]
+            cache[cache_key] = (time.time(), severity_counts)
+
+    if not args.no_cache:
+        save_cache(cache)
 
+    for product in products:
+        product_id = product['id']
         product_data.append({
-            'product_name': product_name,
+            'product_name': product['name'],
             'relative_risk_score': product['relativeRiskScore'] if product['relativeRiskScore'] else 0,
-            'findings_critical': counts['CRITICAL'],
-            'findings_high': counts['HIGH'],
-            'findings_medium': counts['MEDIUM'],
-            'findings_low': counts['LOW'],
+            'findings_critical': counts[(product_id, 'CRITICAL')],
+            'findings_high': counts[(product_id, 'HIGH')],
+            'findings_medium': counts[(product_id, 'MEDIUM')],
+            'findings_low': counts[(product_id, 'LOW')],
             'artifact_count': len(product['assets']),
             'business_unit': product['group']['name'],
             'creator': f'{product["createdBy"]["email"]} {product["createdAt"]}'
         })
 
     # sort the product data by relative risk score
-    product_data = sorted(product_data, key=lambda k: k['relative_risk_score'], reverse=True)
+    product_data.sort(key=itemgetter('relative_risk_score'), reverse=True)
 
-    # write to a csv file
+    # write to a csv file, letting the csv module quote names that contain commas or quotes
     filename = f'{dt_str}-product-report.csv'
-    with open(filename, 'w') as f:
-        f.write('product_name,relative_risk_score,findings_critical,findings_high,findings_medium,findings_low,artifact_count,business_unit,creator\n')
-        for product in product_data:
-            # format the relative risk score float to a string with 1 decimal places
-            product['relative_risk_score'] = f'{product["relative_risk_score"]:.1f}'
-            f.write(f"{product['product_name']},{product['relative_risk_score']},{product['findings_critical']},{product['findings_high']},{product['findings_medium']},{product['findings_low']},{product['artifact_count']},{product['business_unit']},{product['creator']}\n")
+    with open(filename, 'w', newline='', buffering=CSV_BUFFER_SIZE) as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(['product_name', 'relative_risk_score', 'findings_critical', 'findings_high', 'findings_medium', 'findings_low', 'artifact_count', 'business_unit', 'creator'])
+        # format the relative risk score float to a string with 1 decimal places
+        writer.writerows([
+            [product['product_name'], f'{product["relative_risk_score"]:.1f}', product['findings_critical'], product['findings_high'], product['findings_medium'], product['findings_low'], product['artifact_count'], product['business_unit'], product['creator']]
+            for product in product_data
+        ])
         print(f'Wrote product report to {filename}')
 
 
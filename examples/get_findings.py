@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 
 import finite_state_sdk
+from finite_state_sdk.token_cache import TokenCache
 
 
 def main():
@@ -25,7 +26,10 @@ def main():
 
     # Get an auth token - this is a bearer token that you will use for all subsequent requests
     # The token is valid for 24 hours
-    token = finite_state_sdk.get_auth_token(CLIENT_ID, CLIENT_SECRET)
+    # The token is cached on disk so that repeated runs reuse it instead of re-authenticating,
+    # set FINITE_STATE_TOKEN_CACHE_DIR to change where it is stored
+    token_cache = TokenCache(ORGANIZATION_CONTEXT, client_id=CLIENT_ID)
+    token = token_cache.get_token(CLIENT_ID, CLIENT_SECRET)
 
     # Get all CVE findings for a specific asset version
     # For more info see: https://docs.finitestate.io/types/finding-category
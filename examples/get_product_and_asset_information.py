@@ -30,13 +30,18 @@ ORGANIZATION_CONTEXT = os.environ.get("ORGANIZATION_CONTEXT")
 # The token is valid for 24 hours
 token = finite_state_sdk.get_auth_token(CLIENT_ID, CLIENT_SECRET)
 
-products = finite_state_sdk.get_products(token, ORGANIZATION_CONTEXT, business_unit_id='2310647013')
+# Get every product in the business unit together with its asset versions in one paginated query,
+# instead of one get_product_asset_versions call per product
+business_unit_id = '2310647013'
+products = finite_state_sdk.get_all_paginated_results(token, ORGANIZATION_CONTEXT,
+                                                      finite_state_sdk.queries.GET_PRODUCT_ASSET_VERSIONS['query'],
+                                                      finite_state_sdk.queries.GET_PRODUCTS['variables'](business_unit_id=business_unit_id),
+                                                      'allProducts')
 print(f'Found {len(products)} products')
 
 for product in products:
     product_id = product['id']
-    print(f'Getting product asset versions for product {product_id}')
-    product_asset_versions = finite_state_sdk.get_product_asset_versions(token, ORGANIZATION_CONTEXT, product_id=product_id)
+    product_asset_versions = product['assets']
 
-    print(f'Found {len(product_asset_versions)} product asset versions')
+    print(f'Found {len(product_asset_versions)} product asset versions for product {product_id}')
     print(f'Product asset versions: {json.dumps(product_asset_versions, indent=2)}')
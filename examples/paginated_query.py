@@ -31,7 +31,7 @@ token = finite_state_sdk.get_auth_token(CLIENT_ID, CLIENT_SECRET)
 
 # To make a paginated query, make sure to include the _cursor field in the query, and
 # the $after and $first variables in the variables object
-# To use the get_all_paginated_results function, you must specify the response_key, which
+# To use the get_all_paginated_results or iterate_paginated_results functions, you must specify the field, which
 # corresponds to the query field that contains the paginated results,
 # in this case `allSoftwareComponentInstances`
 query = '''
@@ -73,7 +73,9 @@ variables = {
     "first": 100
 }
 
-software_components = finite_state_sdk.get_all_paginated_results(token, ORGANIZATION_CONTEXT, query, variables=variables, response_key="allSoftwareComponentInstances")
+# iterate_paginated_results yields the results page by page, and with prefetch=True the next page
+# is requested in the background while the current page is being printed
+software_components = finite_state_sdk.iterate_paginated_results(token, ORGANIZATION_CONTEXT, query, variables=variables, field="allSoftwareComponentInstances", prefetch=True)
 
 for software_component in software_components:
     print(f'Software component: {json.dumps(software_component, indent=2)}')
@@ -1,15 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
 import json
 from enum import Enum
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
 from warnings import warn
 import finite_state_sdk.queries as queries
-from tenacity import retry, retry_if_exception, stop_after_attempt, wait_fixed
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 from finite_state_sdk.utils import (
     BreakoutException,
+    ThrottledException,
     is_mutation,
     is_not_breakout_exception,
+    wait_retry_after,
 )
 
 API_URL = 'https://platform.finitestate.io/api/v1/graphql'
@@ -28,6 +32,14 @@ MAX_CHUNK_SIZE = 1024**2 * 2000
 MIN CHUNK SIZE: 5 MiB
 """
 MIN_CHUNK_SIZE = 1024**2 * 5
+"""
+GRAPHQL POOL SIZE: 50 connections, enough for threaded callers sharing the session
+"""
+GRAPHQL_POOL_SIZE = 50
+
+# session shared by all GraphQL requests so they reuse keep-alive connections instead of a new TLS handshake per query
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_maxsize=GRAPHQL_POOL_SIZE))
 
 
 class UploadMethod(Enum):
@@ -1299,56 +1311,8 @@ def get_all_paginated_results(token, organization_context, query, variables=None
         list: List of results
     """
 
-    if not field:
-        raise Exception("Error: field is required")
-    if limit and limit > 1000:
-        raise Exception("Error: limit cannot be greater than 1000")
-    if limit and limit < 1:
-        raise Exception("Error: limit cannot be less than 1")
-    if not variables["first"]:
-        raise Exception("Error: first is required")
-    if variables["first"] < 1:
-        raise Exception("Error: first cannot be less than 1")
-    if variables["first"] > 1000:
-        raise Exception("Error: limit cannot be greater than 1000")
-
-    # query the API for the first page of results
-    response_data = send_graphql_query(token, organization_context, query, variables)
-
-    # if there are no results, return an empty list
-    if not response_data:
-        return []
-
-    # create a list to store the results
-    results = []
-
-    # add the first page of results to the list
-    if field in response_data['data']:
-        results.extend(response_data['data'][field])
-    else:
-        raise Exception(f"Error: {field} not in response JSON")
-
-    if len(response_data['data'][field]) > 0:
-        # get the cursor from the last entry in the list
-        cursor = response_data['data'][field][len(response_data['data'][field]) - 1]['_cursor']
-
-        while cursor:
-            if limit and len(results) == limit:
-                break
-
-            variables['after'] = cursor
-
-            # add the next page of results to the list
-            response_data = send_graphql_query(token, organization_context, query, variables)
-            results.extend(response_data['data'][field])
-
-            try:
-                cursor = response_data['data'][field][len(response_data['data'][field]) - 1]['_cursor']
-            except IndexError:
-                # when there is no additional cursor, stop getting more pages
-                cursor = None
-
-    return results
+    return list(iterate_paginated_results(token, organization_context, query, variables=variables, field=field,
+                                          limit=limit))
 
 
 def get_all_products(token, organization_context):
@@ -1569,6 +1533,34 @@ def get_findings(
                                                                            limit=limit), 'allFindings', limit=limit)
 
 
+def get_findings_severity_counts(token, organization_context, asset_version_id=None, category=None, status=None):
+    """
+    Gets the count of Findings for each severity in a single request, instead of calling get_findings(count=True) once per severity.
+    Args:
+        token (str):
+            Auth token. This is the token returned by get_auth_token(). Just the token, do not include "Bearer" in this string.
+        organization_context (str):
+            Organization context. This is provided by the Finite State API management. It looks like "xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx".
+        asset_version_id (str, optional):
+            Asset Version ID to count findings for. If not provided, will count all findings in the organization.
+        category (str, optional):
+            The category of Findings to count. Valid values are "CONFIG_ISSUES", "CREDENTIALS", "CRYPTO_MATERIAL", "CVE", "SAST_ANALYSIS". If not specified, will count all findings.
+            This can be a single string, or an array of values.
+        status (str, optional):
+            The status of Findings to count.
+
+    Raises:
+        Exception: Raised if the query fails.
+
+    Returns:
+        dict: Count of findings keyed by severity, i.e. {"CRITICAL": 1, "HIGH": 2, "MEDIUM": 3, "LOW": 4, "INFO": 5, "UNKNOWN": 6}
+    """
+    response = send_graphql_query(token, organization_context, queries.GET_FINDINGS_SEVERITY_COUNTS['query'],
+                                  queries.GET_FINDINGS_SEVERITY_COUNTS['variables'](asset_version_id=asset_version_id,
+                                                                                    category=category, status=status))
+    return {severity: response["data"][severity.lower()]["count"] for severity in queries.FINDING_SEVERITIES}
+
+
 def get_product_asset_versions(token, organization_context, product_id=None):
     """
     Gets all the asset versions for a product.
@@ -1861,6 +1853,94 @@ def get_software_components(token, organization_context, asset_version_id=None,
                                      'allSoftwareComponentInstances')
 
 
+def iterate_paginated_results(token, organization_context, query, variables=None, field=None, limit=None, prefetch=False):
+    """
+    Iterate over all results from a paginated GraphQL query. Pages are only requested as the results are consumed, so large result sets can be processed without holding every result in memory.
+    This is the generator equivalent of get_all_paginated_results.
+
+    Args:
+        token (str):
+            Auth token. This is the token returned by get_auth_token(). Just the token, do not include "Bearer" in this string, that is handled inside the method.
+        organization_context (str):
+            Organization context. This is provided by the Finite State API management. It looks like "xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx".
+        query (str):
+            The GraphQL query string
+        variables (dict, optional):
+            Variables to be used in the GraphQL query, by default None
+        field (str, required):
+            The field in the response JSON that contains the results
+        limit (int, Optional):
+            The maximum number of results to return. By default, None to return all results. Limit cannot be greater than 1000.
+        prefetch (bool, optional):
+            If True, the next page is requested in a background thread while the current page is being consumed, hiding the request latency behind the caller's processing. By default, False.
+
+    Raises:
+        Exception: If the response status code is not 200, or if the field is not in the response JSON
+
+    Returns:
+        Iterator[dict]: Each result, in the order returned by the API. The arguments are validated when this is called, and the pages are requested as the results are consumed.
+    """
+    if not field:
+        raise Exception("Error: field is required")
+    if limit and limit > 1000:
+        raise Exception("Error: limit cannot be greater than 1000")
+    if limit and limit < 1:
+        raise Exception("Error: limit cannot be less than 1")
+    if not variables["first"]:
+        raise Exception("Error: first is required")
+    if variables["first"] < 1:
+        raise Exception("Error: first cannot be less than 1")
+    if variables["first"] > 1000:
+        raise Exception("Error: limit cannot be greater than 1000")
+
+    # the arguments are checked above, the pages are only requested once the results are consumed
+    return _iterate_paginated_results(token, organization_context, query, variables, field, limit, prefetch)
+
+
+def _iterate_paginated_results(token, organization_context, query, variables, field, limit, prefetch):
+    # query the API for the first page of results
+    response_data = send_graphql_query(token, organization_context, query, variables)
+
+    # if there are no results, stop
+    if not response_data:
+        return
+
+    if field not in response_data['data']:
+        raise Exception(f"Error: {field} not in response JSON")
+
+    # keep count of the results to honor the limit
+    result_count = 0
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        while True:
+            page = response_data['data'][field]
+            result_count += len(page)
+
+            # get the cursor from the last entry in the list, when there is no additional cursor, stop getting more pages
+            cursor = page[-1]['_cursor'] if page else None
+            if limit and result_count == limit:
+                cursor = None
+
+            next_page = None
+            if cursor:
+                variables['after'] = cursor
+                if executor:
+                    next_page = executor.submit(send_graphql_query, token, organization_context, query, variables)
+
+            # yield the page of results
+            yield from page
+
+            if not cursor:
+                break
+
+            response_data = next_page.result() if next_page else send_graphql_query(token, organization_context, query, variables)
+    finally:
+        if executor:
+            # don't block a caller that stops early on a request that is still in flight
+            executor.shutdown(wait=False)
+
+
 def search_sbom(token, organization_context, name=None, version=None, asset_version_id=None, search_method='EXACT',
                 case_sensitive=False) -> list:
     """
@@ -1974,7 +2054,30 @@ query GetSoftwareComponentInstances_SDK(
     return records
 
 
-@retry(stop=stop_after_attempt(5), wait=wait_fixed(5), retry=retry_if_exception(is_not_breakout_exception))
+def set_session(session):
+    """
+    Sets the requests.Session used to send GraphQL queries, e.g. to size its connection pool for a highly concurrent script or to add proxies and custom headers.
+    By default, the SDK uses a shared session with a connection pool of GRAPHQL_POOL_SIZE connections.
+    Args:
+        session (requests.Session):
+            The session to send all subsequent GraphQL queries with.
+
+    Raises:
+        ValueError: If session is None.
+
+    Returns:
+        None
+    """
+    global _SESSION
+
+    if session is None:
+        raise ValueError("Session is required")
+
+    _SESSION = session
+
+
+@retry(stop=stop_after_attempt(5), wait=wait_retry_after(wait_random_exponential(multiplier=1, max=30)),
+       retry=retry_if_exception(is_not_breakout_exception))
 def send_graphql_query(token, organization_context, query, variables=None):
     """
     Send a GraphQL query to the API
@@ -1990,7 +2093,9 @@ def send_graphql_query(token, organization_context, query, variables=None):
             Variables to be used in the GraphQL query, by default None
 
     Raises:
-        Exception: If the response status code is not 200
+        BreakoutException: If the response contains GraphQL errors, a client error (4xx other than 429) is returned, or a mutation fails. These are not retried.
+        ThrottledException: If the API throttles the query (429). The query is retried after the Retry-After header, or with jittered exponential backoff if there is none.
+        Exception: If the response status code is not 200. The query is retried with jittered exponential backoff.
 
     Returns:
         dict: Response JSON
@@ -2002,7 +2107,7 @@ def send_graphql_query(token, organization_context, query, variables=None):
     }
     data = {"query": query, "variables": variables}
 
-    response = requests.post(API_URL, headers=headers, json=data)
+    response = _SESSION.post(API_URL, headers=headers, json=data)
     if response.status_code == 200:
         thejson = response.json()
 
@@ -2011,10 +2116,16 @@ def send_graphql_query(token, organization_context, query, variables=None):
             raise BreakoutException(f"Error: {thejson['errors']}")
 
         return thejson
+    elif 400 <= response.status_code < 500 and response.status_code != 429:
+        # client errors will fail the same way on every attempt, so do not retry them
+        raise BreakoutException(f"Error: {response.status_code} - {response.text}")
     else:
         is_mutation_operation = is_mutation(query)
         if is_mutation_operation:
             raise BreakoutException(f"Error: {response.status_code} - {response.text}")
+        elif response.status_code == 429:
+            # keep the response so the retry can wait for as long as the server asks
+            raise ThrottledException(f"Error: {response.status_code} - {response.text}", response)
         else:
             raise Exception(f"Error: {response.status_code} - {response.text}")
 
@@ -434,6 +434,51 @@ query GetFindingsCount_SDK($filter: FindingFilter)
     "variables": lambda asset_version_id=None, category=None, cve_id=None, finding_id=None, status=None, severity=None, limit=None: _create_GET_FINDINGS_VARIABLES(asset_version_id=asset_version_id, category=category, cve_id=cve_id, finding_id=finding_id, status=status, severity=severity, limit=limit, count=True)
 }
 
+FINDING_SEVERITIES = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "INFO", "UNKNOWN"]
+
+
+def _create_GET_FINDINGS_SEVERITY_COUNTS_VARIABLES(asset_version_id=None, category=None, status=None):
+    # build the shared filter once, then add the severity to a copy of it for each count
+    base_filter = _create_GET_FINDINGS_VARIABLES(asset_version_id=asset_version_id, category=category, status=status, count=True)["filter"]
+
+    # one count filter per severity, named to match the $<severity>Filter variables of the aliased query
+    return {f"{severity.lower()}Filter": {**base_filter, "severity": severity} for severity in FINDING_SEVERITIES}
+
+
+GET_FINDINGS_SEVERITY_COUNTS = {
+    "query": """
+query GetFindingsSeverityCounts_SDK(
+    $criticalFilter: FindingFilter,
+    $highFilter: FindingFilter,
+    $mediumFilter: FindingFilter,
+    $lowFilter: FindingFilter,
+    $infoFilter: FindingFilter,
+    $unknownFilter: FindingFilter
+)
+{
+    critical: _allFindingsMeta(filter: $criticalFilter) {
+        count
+    }
+    high: _allFindingsMeta(filter: $highFilter) {
+        count
+    }
+    medium: _allFindingsMeta(filter: $mediumFilter) {
+        count
+    }
+    low: _allFindingsMeta(filter: $lowFilter) {
+        count
+    }
+    info: _allFindingsMeta(filter: $infoFilter) {
+        count
+    }
+    unknown: _allFindingsMeta(filter: $unknownFilter) {
+        count
+    }
+}
+""",
+    "variables": lambda asset_version_id=None, category=None, status=None: _create_GET_FINDINGS_SEVERITY_COUNTS_VARIABLES(asset_version_id=asset_version_id, category=category, status=status)
+}
+
 GET_FINDINGS = {
     "query": """
 query GetFindingsForAnAssetVersion_SDK (
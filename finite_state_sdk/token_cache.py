@@ -12,67 +12,74 @@ token_cache = TokenCache(ORGANIZATION_CONTEXT)
 token = token_cache.get_token(CLIENT_ID, CLIENT_SECRET)
 """
 
+"""
+TOKEN LIFETIME: 24 hours
+"""
+TOKEN_LIFETIME = 24 * 60 * 60
+
+"""
+TOKEN EXPIRY MARGIN: 60 seconds, a cached token this close to expiring is replaced rather than reused
+"""
+TOKEN_EXPIRY_MARGIN = 60
+
 
 class TokenCache():
     """
     A class for caching Finite State API tokens so that a new token is not required for every run of the script
-    deprecated: Use finite_state_sdk.get_auth_token instead
+    The tokens are stored under cache_dir, which defaults to the FINITE_STATE_TOKEN_CACHE_DIR environment variable or .tokencache
     """
-    def __init__(self, organization_context, client_id=None):
+    def __init__(self, organization_context, client_id=None, cache_dir=None):
         self.token = None
 
         self.client_id = client_id
         self.organization_context = organization_context
-        self.token_path = f'.tokencache/{self.organization_context}'
+        self.cache_dir = cache_dir or os.environ.get('FINITE_STATE_TOKEN_CACHE_DIR', '.tokencache')
+        self.token_path = f'{self.cache_dir}/{self.organization_context}'
         if self.client_id:
-            self.token_path = f'.tokencache/{self.organization_context}-{self.client_id}'
-        else:
-            self.token_file = f'.tokencache/{self.organization_context}/token.txt'
+            self.token_path = f'{self.cache_dir}/{self.organization_context}-{self.client_id}'
         self.token_file = f'{self.token_path}/token.txt'
 
-        # create the token cache directory if it doesn't exist
-        if not os.path.exists('.tokencache'):
-            os.mkdir('.tokencache')
-
-        # create the client directory if it doesn't exist
-        if not os.path.exists(self.token_path):
-            os.mkdir(self.token_path)
+        # create the token cache and client directories if they don't exist
+        os.makedirs(self.token_path, exist_ok=True)
 
     def _get_token_from_api(self, client_id, client_secret):
         # get a new token
         self.token = finite_state_sdk.get_auth_token(client_id, client_secret)
 
-        # write it to disk
-        with open(self.token_file, 'w') as f:
+        # write it to disk, readable only by the current user
+        with os.fdopen(os.open(self.token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
             f.write(self.token)
 
     def get_token(self, client_id, client_secret):
         # try to read from disk
         if self.token is None:
-            if os.path.exists(self.token_file):
-                # check how old the file is, if it is more than 24 hours old, delete it
-                if os.path.getmtime(self.token_file) < time.time() - 24 * 60 * 60:
-                    print("Token is more than 24 hours old, deleting it...")
-                    self.invalidate_token()
-
-                    self._get_token_from_api(client_id, client_secret)
-                    return self.token
-                else:
-                    print("Getting saved token from disk...")
-                    with open(self.token_file, 'r') as f:
-                        self.token = f.read()
-
-                    return self.token
-            else:
+            try:
+                token_mtime = os.path.getmtime(self.token_file)
+            except FileNotFoundError:
                 print("Querying the API for a new token...")
                 self._get_token_from_api(client_id, client_secret)
                 return self.token
 
+            # check how old the file is, if it is about to expire, delete it
+            if token_mtime < time.time() - (TOKEN_LIFETIME - TOKEN_EXPIRY_MARGIN):
+                print("Token is expired or about to expire, deleting it...")
+                self.invalidate_token()
+
+                self._get_token_from_api(client_id, client_secret)
+                return self.token
+            else:
+                print("Getting saved token from disk...")
+                with open(self.token_file, 'r') as f:
+                    self.token = f.read()
+
+                return self.token
+
         else:
             return self.token
 
     def invalidate_token(self):
         self.token = None
-        if os.path.exists(self.token_file):
+        try:
             os.remove(self.token_file)
-            self.token = None
+        except FileNotFoundError:
+            pass
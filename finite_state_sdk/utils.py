@@ -1,5 +1,8 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from gql import gql
 from graphql.language.ast import OperationDefinitionNode, OperationType
+from tenacity.wait import wait_base
 
 
 class BreakoutException(Exception):
@@ -13,6 +16,60 @@ def is_not_breakout_exception(exception):
     return not isinstance(exception, BreakoutException)
 
 
+class ThrottledException(Exception):
+    """Exception raised when the API throttles a request. Carries the response so its Retry-After header can be honored."""
+
+    def __init__(self, message, response):
+        super().__init__(message)
+        self.response = response
+
+
+def get_retry_after(response):
+    """
+    Get the number of seconds to wait from the Retry-After header of a response.
+
+    Args:
+        response (requests.Response): The throttled response.
+
+    Returns:
+        float: The seconds to wait, or None if the header is missing or invalid.
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is None:
+        return None
+
+    # the header is either a number of seconds or an HTTP date
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class wait_retry_after(wait_base):
+    """Wait for the Retry-After of a throttled response, capped at max seconds, otherwise use the fallback wait strategy."""
+
+    def __init__(self, fallback, max=120):
+        self.fallback = fallback
+        self.max = max
+
+    def __call__(self, retry_state):
+        exception = retry_state.outcome.exception()
+        if isinstance(exception, ThrottledException):
+            retry_after = get_retry_after(exception.response)
+            if retry_after is not None:
+                return min(retry_after, self.max)
+
+        return self.fallback(retry_state)
+
+
 def is_mutation(query_string):
     """
     Check if the provided GraphQL query string contains any mutations.
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+from finite_state_sdk import get_findings_severity_counts, queries
+
+
+class TestGetFindingsSeverityCounts:
+    # Define test data
+    auth_token = "mock_auth_token"
+    organization_context = "mock_organization_context"
+    asset_version_id = "mock_asset_version_id"
+    category = "mock_category"
+    status = "mock_status"
+
+    @patch("finite_state_sdk.send_graphql_query")
+    def test_get_findings_severity_counts(self, mock_send_graphql_query):
+        # Mock response object
+        mock_send_graphql_query.return_value = {
+            "data": {
+                "critical": {"count": 1},
+                "high": {"count": 2},
+                "medium": {"count": 3},
+                "low": {"count": 4},
+                "info": {"count": 5},
+                "unknown": {"count": 6},
+            }
+        }
+
+        # Call the function
+        result = get_findings_severity_counts(self.auth_token, self.organization_context,
+                                              asset_version_id=self.asset_version_id, category=self.category,
+                                              status=self.status)
+
+        # Define expected query and variables
+        expected_query = queries.GET_FINDINGS_SEVERITY_COUNTS['query']
+        expected_variables = queries.GET_FINDINGS_SEVERITY_COUNTS['variables'](
+            asset_version_id=self.asset_version_id,
+            category=self.category,
+            status=self.status
+        )
+
+        # Assertions
+        mock_send_graphql_query.assert_called_once_with(
+            self.auth_token,
+            self.organization_context,
+            expected_query,
+            expected_variables,
+        )
+        assert result == {"CRITICAL": 1, "HIGH": 2, "MEDIUM": 3, "LOW": 4, "INFO": 5, "UNKNOWN": 6}
+
+    def test_get_findings_severity_counts_variables(self):
+        variables = queries.GET_FINDINGS_SEVERITY_COUNTS['variables'](asset_version_id=self.asset_version_id)
+
+        # One filter per severity, each matching the single severity count query
+        assert set(variables) == {"criticalFilter", "highFilter", "mediumFilter", "lowFilter", "infoFilter", "unknownFilter"}
+        assert variables["highFilter"] == queries.GET_FINDINGS_COUNT['variables'](
+            asset_version_id=self.asset_version_id, severity="HIGH")["filter"]
@@ -0,0 +1,90 @@
+import threading
+import pytest
+from unittest.mock import patch
+from finite_state_sdk import iterate_paginated_results
+
+
+class TestIteratePaginatedResults:
+    # Define test data
+    auth_token = "mock_auth_token"
+    organization_context = "mock_organization_context"
+    query = "query { allThings { _cursor id } }"
+    field = "allThings"
+
+    # Define mock pages for the mocked function
+    mock_pages = [
+        {"data": {"allThings": [{"_cursor": "1", "id": "thing1"}, {"_cursor": "2", "id": "thing2"}]}},
+        {"data": {"allThings": [{"_cursor": "3", "id": "thing3"}]}},
+        {"data": {"allThings": []}},
+    ]
+
+    @patch("finite_state_sdk.send_graphql_query", side_effect=mock_pages)
+    def test_iterate_paginated_results(self, mock_send_graphql_query):
+        variables = {"after": None, "first": 2}
+
+        # Call the function
+        results = iterate_paginated_results(self.auth_token, self.organization_context, self.query,
+                                            variables=variables, field=self.field)
+
+        # No pages are requested until the results are consumed
+        mock_send_graphql_query.assert_not_called()
+
+        # Assertions
+        assert [result["id"] for result in results] == ["thing1", "thing2", "thing3"]
+        assert mock_send_graphql_query.call_count == 3
+        assert variables["after"] == "3"
+
+    @patch("finite_state_sdk.send_graphql_query", side_effect=mock_pages)
+    def test_iterate_paginated_results_fetches_pages_lazily(self, mock_send_graphql_query):
+        variables = {"after": None, "first": 2}
+
+        results = iterate_paginated_results(self.auth_token, self.organization_context, self.query,
+                                            variables=variables, field=self.field)
+
+        # Consuming the first page does not request the second one
+        assert next(results)["id"] == "thing1"
+        assert next(results)["id"] == "thing2"
+        assert mock_send_graphql_query.call_count == 1
+
+    @patch("finite_state_sdk.send_graphql_query")
+    def test_iterate_paginated_results_validates_when_called(self, mock_send_graphql_query):
+        # Invalid arguments raise at the call site, before any results are consumed
+        with pytest.raises(Exception, match="field is required"):
+            iterate_paginated_results(self.auth_token, self.organization_context, self.query,
+                                      variables={"after": None, "first": 2}, field=None)
+        with pytest.raises(Exception, match="limit cannot be greater than 1000"):
+            iterate_paginated_results(self.auth_token, self.organization_context, self.query,
+                                      variables={"after": None, "first": 5000}, field=self.field)
+        mock_send_graphql_query.assert_not_called()
+
+    @patch("finite_state_sdk.send_graphql_query")
+    def test_iterate_paginated_results_prefetch(self, mock_send_graphql_query):
+        variables = {"after": None, "first": 2}
+        pages = iter(self.mock_pages)
+        second_page_requested = threading.Event()
+
+        def send_graphql_query(*args):
+            if mock_send_graphql_query.call_count == 2:
+                second_page_requested.set()
+            return next(pages)
+
+        mock_send_graphql_query.side_effect = send_graphql_query
+
+        results = iterate_paginated_results(self.auth_token, self.organization_context, self.query,
+                                            variables=variables, field=self.field, prefetch=True)
+
+        # The second page is requested while the first page is still being consumed
+        assert next(results)["id"] == "thing1"
+        assert second_page_requested.wait(timeout=5)
+        assert list(result["id"] for result in results) == ["thing2", "thing3"]
+
+    @patch("finite_state_sdk.send_graphql_query", side_effect=mock_pages)
+    def test_iterate_paginated_results_prefetch_all_results(self, mock_send_graphql_query):
+        variables = {"after": None, "first": 2}
+
+        results = iterate_paginated_results(self.auth_token, self.organization_context, self.query,
+                                            variables=variables, field=self.field, prefetch=True)
+
+        # Assertions
+        assert [result["id"] for result in results] == ["thing1", "thing2", "thing3"]
+        assert mock_send_graphql_query.call_count == 3
@@ -33,7 +33,7 @@ class TestSendGraphQLQuery:
         "Organization-Context": organization_context,
     }
 
-    @patch("finite_state_sdk.requests.post")
+    @patch("finite_state_sdk._SESSION.post")
     def test_send_graphql_query_success(self, mock_post):
         # Mock response
         mock_response = MagicMock()
@@ -52,7 +52,7 @@ class TestSendGraphQLQuery:
         )
         assert result == {"data": {"result": "mock_result"}}
 
-    @patch("finite_state_sdk.requests.post")
+    @patch("finite_state_sdk._SESSION.post")
     def test_send_graphql_query_graphql_error(self, mock_post):
         # Mock response with GraphQL errors
         mock_response = MagicMock()
@@ -66,7 +66,7 @@ class TestSendGraphQLQuery:
 
         assert "Error: [{'message': 'GraphQL error occurred'}]" in str(excinfo.value)
 
-    @patch("finite_state_sdk.requests.post")
+    @patch("finite_state_sdk._SESSION.post")
     def test_send_graphql_query_internal_server_error(self, mock_post):
         # Mock response
         mock_response = MagicMock()
@@ -85,7 +85,7 @@ class TestSendGraphQLQuery:
         # Assert it was called exactly 5 times because of the retries
         assert mock_post.call_count == 5
 
-    @patch("finite_state_sdk.requests.post")
+    @patch("finite_state_sdk._SESSION.post")
     def test_send_graphql_query_mutation_success(self, mock_post):
         # Mock response for mutation
         mock_response = MagicMock()
@@ -104,7 +104,7 @@ class TestSendGraphQLQuery:
         )
         assert result == {"data": {"createItem": {"id": "1", "name": "mock_item"}}}
 
-    @patch("finite_state_sdk.requests.post")
+    @patch("finite_state_sdk._SESSION.post")
     def test_send_graphql_query_mutation_no_retry(self, mock_post):
         # Mock response for mutation failure
         mock_response = MagicMock()
@@ -120,7 +120,7 @@ class TestSendGraphQLQuery:
         assert "Error: [{'message': 'Mutation error occurred'}]" in str(excinfo.value)
         mock_post.assert_called_once()  # Ensure that the post was called only once
 
-    @patch("finite_state_sdk.requests.post")
+    @patch("finite_state_sdk._SESSION.post")
     def test_send_graphql_query_mutation_internal_server_error(self, mock_post):
         # Mock response
         mock_response = MagicMock()
@@ -135,3 +135,40 @@ class TestSendGraphQLQuery:
 
         assert "Error: 500 - Internal Server Error" in str(excinfo.value)
         mock_post.assert_called_once()
+
+    @patch("finite_state_sdk._SESSION.post")
+    def test_send_graphql_query_client_error_no_retry(self, mock_post):
+        # Mock response
+        mock_response = MagicMock()
+        mock_response.status_code = 401
+        mock_response.text = "Unauthorized"
+        mock_post.return_value = mock_response
+
+        # Call the function and expect a BreakoutException since client errors are not retried
+        with pytest.raises(BreakoutException) as excinfo:
+            send_graphql_query(self.token, self.organization_context, self.query, self.variables)
+
+        assert "Error: 401 - Unauthorized" in str(excinfo.value)
+        mock_post.assert_called_once()
+
+    @patch("finite_state_sdk.is_mutation", return_value=False)
+    @patch("finite_state_sdk._SESSION.post")
+    def test_send_graphql_query_throttled_honors_retry_after(self, mock_post, mock_is_mutation):
+        # Mock a throttled response followed by a successful one
+        throttled_response = MagicMock()
+        throttled_response.status_code = 429
+        throttled_response.text = "Too Many Requests"
+        throttled_response.headers = {"Retry-After": "7"}
+        success_response = MagicMock()
+        success_response.status_code = 200
+        success_response.json.return_value = {"data": {"result": "mock_result"}}
+        mock_post.side_effect = [throttled_response, success_response]
+
+        # Call the function without actually sleeping between the attempts
+        with patch.object(send_graphql_query.retry, "sleep") as mock_sleep:
+            result = send_graphql_query(self.token, self.organization_context, self.query, self.variables)
+
+        # The retry waits for as long as the server asked
+        mock_sleep.assert_called_once_with(7.0)
+        assert result == {"data": {"result": "mock_result"}}
+        assert mock_post.call_count == 2
@@ -0,0 +1,38 @@
+import pytest
+from unittest.mock import MagicMock
+import finite_state_sdk
+from finite_state_sdk import send_graphql_query, set_session
+
+
+class TestSetSession:
+    # Define test data
+    token = "mock_token"
+    organization_context = "mock_organization_context"
+    query = "query { someField }"
+
+    def test_set_session(self):
+        # Mock session and response
+        mock_session = MagicMock()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"data": {"someField": "mock_result"}}
+        mock_session.post.return_value = mock_response
+
+        default_session = finite_state_sdk._SESSION
+        try:
+            set_session(mock_session)
+
+            # Call the function
+            result = send_graphql_query(self.token, self.organization_context, self.query)
+        finally:
+            set_session(default_session)
+
+        # Assertions
+        mock_session.post.assert_called_once()
+        assert result == {"data": {"someField": "mock_result"}}
+
+    def test_set_session_missing_session(self):
+        with pytest.raises(ValueError) as excinfo:
+            set_session(None)
+
+        assert str(excinfo.value) == "Session is required"
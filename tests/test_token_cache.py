@@ -0,0 +1,55 @@
+import os
+import time
+from unittest.mock import patch
+from finite_state_sdk.token_cache import TokenCache, TOKEN_LIFETIME
+
+
+class TestTokenCache:
+    # Define test data
+    organization_context = "mock_organization_context"
+    client_id = "mock_client_id"
+    client_secret = "mock_client_secret"
+    mock_token = "mock_token"
+
+    @patch("finite_state_sdk.get_auth_token", return_value=mock_token)
+    def test_token_cache_reuses_token_from_disk(self, mock_get_auth_token, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        # The first cache queries the API and writes the token to disk
+        assert TokenCache(self.organization_context, client_id=self.client_id).get_token(self.client_id, self.client_secret) == self.mock_token
+
+        # A second cache in a new run reads the token back instead of querying the API
+        assert TokenCache(self.organization_context, client_id=self.client_id).get_token(self.client_id, self.client_secret) == self.mock_token
+        mock_get_auth_token.assert_called_once_with(self.client_id, self.client_secret)
+
+    @patch("finite_state_sdk.get_auth_token", return_value=mock_token)
+    def test_token_cache_file_is_private(self, mock_get_auth_token, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        token_cache = TokenCache(self.organization_context, client_id=self.client_id)
+        token_cache.get_token(self.client_id, self.client_secret)
+
+        assert os.stat(token_cache.token_file).st_mode & 0o777 == 0o600
+
+    @patch("finite_state_sdk.get_auth_token", return_value=mock_token)
+    def test_token_cache_replaces_token_about_to_expire(self, mock_get_auth_token, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        token_cache = TokenCache(self.organization_context, client_id=self.client_id)
+        token_cache.get_token(self.client_id, self.client_secret)
+
+        # Age the cached token to within a few seconds of its lifetime
+        issued_at = time.time() - TOKEN_LIFETIME + 5
+        os.utime(token_cache.token_file, (issued_at, issued_at))
+
+        TokenCache(self.organization_context, client_id=self.client_id).get_token(self.client_id, self.client_secret)
+        assert mock_get_auth_token.call_count == 2
+
+    @patch("finite_state_sdk.get_auth_token", return_value=mock_token)
+    def test_token_cache_dir_from_environment(self, mock_get_auth_token, tmp_path, monkeypatch):
+        monkeypatch.setenv("FINITE_STATE_TOKEN_CACHE_DIR", str(tmp_path / "tokens"))
+
+        token_cache = TokenCache(self.organization_context, client_id=self.client_id)
+        token_cache.get_token(self.client_id, self.client_secret)
+
+        assert os.path.exists(tmp_path / "tokens" / f"{self.organization_context}-{self.client_id}" / "token.txt")